@@ -107,4 +107,8 @@ notes:
     standard environment variables, then finally by explicit parameters in
     plays. More information can be found at
     U(https://docs.openstack.org/openstacksdk/)
+  - Every task opens its own connection and authenticates against Keystone.
+    To reuse tokens across tasks, enable the openstacksdk auth cache by
+    setting C(cache.auth) to C(true) in clouds.yaml. This requires the
+    python C(keyring) library on the target host.
 '''
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Copyright (c) 2025 British Broadcasting Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Helpers shared by the network_segment and network_segments modules.
+
+SEGMENT_ATTRIBUTES = ('description', 'network_type', 'physical_network',
+                      'segmentation_id')
+
+# Attributes which are used to identify a segment in addition to its name.
+SEGMENT_FILTERS = ('network_type', 'physical_network')
+
+# As the name is required and all other attributes cannot be changed (and
+# are used to identify the segment), only these attributes can be updated.
+UPDATABLE_ATTRIBUTES = frozenset(['description'])
+
+# Fields which are documented in RETURN of the segment modules.
+RETURN_FIELDS = ('description', 'id', 'name', 'network_id', 'network_type',
+                 'physical_network', 'segmentation_id')
+
+
+def segment_filters(desired):
+    """Return the attributes of the desired segment which identify it."""
+    return {k: desired[k] for k in SEGMENT_FILTERS
+            if desired.get(k) is not None}
+
+
+def segment_to_dict(segment):
+    """Return the documented fields of a segment as a dictionary.
+
+    This avoids Resource.to_dict(), which walks every attribute of the
+    resource although only a few of them are returned.
+    """
+    return {f: segment[f] for f in RETURN_FIELDS}
+
+
+def index_segments(segments):
+    """Group segments by name.
+
+    Neutron allows non-unique segment names, hence each name maps to a list
+    of segments.
+    """
+    index = {}
+    for segment in segments:
+        index.setdefault(segment['name'], []).append(segment)
+    return index
+
+
+def match_segment(desired, existing_index):
+    """Find the existing segment which matches the desired one.
+
+    Returns:
+        The matching segment or None if no segment matches.
+
+    Raises:
+        ValueError: More than a single segment matches the desired one.
+    """
+    filters = segment_filters(desired)
+    matches = [segment for segment in existing_index.get(desired['name'], [])
+               if all(segment[k] == v for k, v in filters.items())]
+
+    if len(matches) > 1:
+        raise ValueError('Found more than a single segment'
+                         ' matching name {0}.'.format(desired['name']))
+    elif len(matches) == 1:
+        return matches[0]
+    else:  # len(matches) == 0
+        return None
+
+
+def reconcile_segment(conn, state, desired, existing):
+    """Create, update or delete a segment so that it matches the desired one.
+
+    Arguments:
+        conn: Connection to SDK object.
+        state: Either 'present' or 'absent'.
+        desired: Dictionary with the segment name, network_id and the
+                 attributes from SEGMENT_ATTRIBUTES.
+        existing: Matching segment as returned by match_segment().
+
+    Returns:
+        Tuple of changed flag and the resulting segment, which is None when
+        the segment is absent.
+    """
+    if state == 'absent':
+        if not existing:
+            return False, None
+        conn.network.delete_segment(existing['id'])
+        return True, None
+
+    if not existing:
+        kwargs = {k: desired[k] for k in SEGMENT_ATTRIBUTES + ('network_id',)
+                  if desired.get(k) is not None}
+        return True, conn.network.create_segment(name=desired['name'],
+                                                 **kwargs)
+
+    # Only update attributes the user wants something specific for and which
+    # differ from what we have right now.
+    update_kwargs = {k: v for k, v in desired.items()
+                     if k in UPDATABLE_ATTRIBUTES
+                     and v is not None
+                     and existing[k] != v}
+
+    if update_kwargs:
+        return True, conn.network.update_segment(existing['id'],
+                                                 **update_kwargs)
+
+    return False, existing
@@ -97,7 +97,17 @@ network_segment:
             type: int
 '''
 
+import itertools
+
 from ansible_collections.openstack.cloud.plugins.module_utils.openstack import OpenStackModule
+from ansible_collections.openstack.cloud.plugins.module_utils.network_segment import (
+    SEGMENT_ATTRIBUTES,
+    index_segments,
+    match_segment,
+    reconcile_segment,
+    segment_filters,
+    segment_to_dict,
+)
 
 
 class NetworkSegmentModule(OpenStackModule):
@@ -115,63 +125,43 @@ class NetworkSegmentModule(OpenStackModule):
     def run(self):
 
         state = self.params['state']
-        name = self.params['name']
         network_name_or_id = self.params['network']
 
-        kwargs = {}
-        filters = {}
-        for arg in ('description', 'network_type', 'physical_network', 'segmentation_id'):
-            if self.params[arg] is not None:
-                kwargs[arg] = self.params[arg]
-
-        for arg in ('network_type', 'physical_network'):
-            if self.params[arg] is not None:
-                filters[arg] = self.params[arg]
+        desired = {k: self.params[k] for k in ('name',) + SEGMENT_ATTRIBUTES}
+        filters = segment_filters(desired)
 
         if network_name_or_id:
             network = self.conn.network.find_network(network_name_or_id,
                                                      ignore_missing=False,
                                                      **filters)
-            kwargs['network_id'] = network.id
+            desired['network_id'] = network.id
             filters['network_id'] = network.id
 
-        segment = self.conn.network.find_segment(name, **filters)
+        segment = self._find(desired, filters)
+
+        changed, segment = reconcile_segment(self.conn, state, desired,
+                                             segment)
 
         if state == 'present':
-            if not segment:
-                segment = self.conn.network.create_segment(name=name, **kwargs)
-                changed = True
-            else:
-                changed = False
-                update_kwargs = {}
-
-                # As the name is required and all other attributes cannot be
-                # changed (and appear in filters above), we only need to handle
-                # updates to the description here.
-                for arg in ["description"]:
-                    if (
-                        arg in kwargs
-                        # ensure user wants something specific
-                        and kwargs[arg] is not None
-                        # and this is not what we have right now
-                        and kwargs[arg] != segment[arg]
-                    ):
-                        update_kwargs[arg] = kwargs[arg]
-
-                if update_kwargs:
-                    segment = self.conn.network.update_segment(
-                        segment.id, **update_kwargs
-                    )
-                    changed = True
-
-            segment = segment.to_dict(computed=False)
+            segment = segment_to_dict(segment)
             self.exit(changed=changed, network_segment=segment, id=segment['id'])
         elif state == 'absent':
-            if not segment:
-                self.exit(changed=False)
-            else:
-                self.conn.network.delete_segment(segment['id'])
-                self.exit(changed=True)
+            self.exit(changed=changed)
+
+    def _find(self, desired, filters):
+        # find_segment() attempts a GET by id before it lists the segments
+        # filtered by name. List by name directly to save that request, which
+        # means that segments are only looked up by name, not by id. Two records
+        # are enough to tell whether the name is unique, so stop reading
+        # before the SDK fetches any further pages.
+        segments = itertools.islice(
+            self.conn.network.segments(name=desired['name'], limit=2,
+                                       **filters),
+            2)
+        try:
+            return match_segment(desired, index_segments(segments))
+        except ValueError as e:
+            self.fail_json(msg=str(e))
 
 
 def main():
@@ -0,0 +1,210 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 British Broadcasting Corporation
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+DOCUMENTATION = '''
+---
+module: network_segments
+short_description: Creates/removes multiple network segments from OpenStack
+author: OpenStack Ansible SIG
+description:
+   - Add, update or remove several segments of a network in OpenStack with
+     a single task.
+   - Existing segments of the network are listed once and all required
+     changes are applied concurrently.
+options:
+   network:
+     description:
+        - Name or id of the network to which the segments should be attached
+     required: true
+     type: str
+   segments:
+     description:
+        - List of segments which should be present or absent.
+        - Although Neutron allows for non-unique segment names, this module
+          enforces segment name uniqueness.
+     required: true
+     type: list
+     elements: dict
+     suboptions:
+       name:
+         description:
+            - Name to be assigned to the segment.
+         required: true
+         type: str
+       description:
+         description:
+            - Description of the segment
+         type: str
+       network_type:
+         description:
+            - The type of physical network that maps to this segment
+              resource.
+         type: str
+       physical_network:
+         description:
+            - The physical network where this segment object is implemented.
+         type: str
+       segmentation_id:
+         description:
+            - An isolated segment on the physical network. The
+              I(network_type) attribute defines the segmentation model. For
+              example, if the I(network_type) value is vlan, this ID is a
+              vlan identifier. If the I(network_type) value is gre, this ID
+              is a gre key.
+         type: int
+   state:
+     description:
+        - Indicate desired state of the segments.
+     choices: ['present', 'absent']
+     default: present
+     type: str
+extends_documentation_fragment:
+- openstack.cloud.openstack
+'''
+
+EXAMPLES = '''
+# Create two VLAN type network segments on network 'my_network'.
+- openstack.cloud.network_segments:
+    cloud: mycloud
+    network: my_network
+    segments:
+      - name: segment1
+        network_type: vlan
+        segmentation_id: 2000
+        physical_network: my_physnet
+      - name: segment2
+        network_type: vlan
+        segmentation_id: 2001
+        physical_network: my_physnet
+    state: present
+'''
+
+RETURN = '''
+network_segments:
+    description: List of dictionaries describing the network segments.
+    returned: On success when I(state) is C(present).
+    type: list
+    elements: dict
+    contains:
+        description:
+            description: Description
+            type: str
+        id:
+            description: Id
+            type: str
+        name:
+            description: Name
+            type: str
+        network_id:
+            description: Network Id
+            type: str
+        network_type:
+            description: Network type
+            type: str
+        physical_network:
+            description: Physical network
+            type: str
+        segmentation_id:
+            description: Segmentation Id
+            type: int
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ansible_collections.openstack.cloud.plugins.module_utils.openstack import OpenStackModule
+from ansible_collections.openstack.cloud.plugins.module_utils.network_segment import (
+    index_segments,
+    match_segment,
+    reconcile_segment,
+    segment_to_dict,
+)
+
+# Neutron handles concurrent writes, but limit the number of parallel
+# requests to avoid overloading the API.
+MAX_WORKERS = 8
+
+
+class NetworkSegmentsModule(OpenStackModule):
+
+    argument_spec = dict(
+        network=dict(required=True),
+        segments=dict(
+            required=True, type='list', elements='dict',
+            options=dict(
+                name=dict(required=True),
+                description=dict(),
+                network_type=dict(),
+                physical_network=dict(),
+                segmentation_id=dict(type='int'),
+            ),
+        ),
+        state=dict(default='present', choices=['absent', 'present'])
+    )
+
+    def run(self):
+
+        state = self.params['state']
+
+        names = [segment['name'] for segment in self.params['segments']]
+        if len(names) != len(set(names)):
+            self.fail_json(msg='Segment names must be unique.')
+
+        network = self.conn.network.find_network(self.params['network'],
+                                                 ignore_missing=False)
+
+        existing_index = index_segments(
+            self.conn.network.segments(network_id=network.id))
+
+        desired_segments = []
+        existing_segments = []
+        for segment in self.params['segments']:
+            desired = dict(segment, network_id=network.id)
+            try:
+                existing = match_segment(desired, existing_index)
+            except ValueError as e:
+                self.fail_json(msg=str(e))
+            desired_segments.append(desired)
+            existing_segments.append(existing)
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = [executor.submit(reconcile_segment, self.conn, state,
+                                       desired, existing)
+                       for desired, existing
+                       in zip(desired_segments, existing_segments)]
+
+        # Collect the outcome of every segment before reporting any error, so
+        # that changes which did happen are not hidden from the user.
+        results = []
+        errors = []
+        for desired, future in zip(desired_segments, futures):
+            try:
+                results.append(future.result())
+            except self.sdk.exceptions.OpenStackCloudException as e:
+                errors.append('{0}: {1}'.format(desired['name'], e))
+
+        changed = any(c for c, _ in results)
+
+        if errors:
+            self.fail_json(
+                msg='Failed to {0} segments: {1}'.format(
+                    'create or update' if state == 'present' else 'delete',
+                    '; '.join(errors)),
+                changed=changed)
+
+        if state == 'present':
+            segments = [segment_to_dict(s) for _, s in results]
+            self.exit(changed=changed, network_segments=segments)
+        elif state == 'absent':
+            self.exit(changed=changed)
+
+
+def main():
+    module = NetworkSegmentsModule()
+    module()
+
+
+if __name__ == '__main__':
+    main()
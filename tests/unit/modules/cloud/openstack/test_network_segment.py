@@ -0,0 +1,175 @@
+import pytest
+from unittest import mock
+
+from ansible_collections.openstack.cloud.plugins.module_utils.network_segment import (
+    index_segments,
+    match_segment,
+    reconcile_segment,
+)
+from ansible_collections.openstack.cloud.plugins.module_utils.openstack import OpenStackModule
+from ansible_collections.openstack.cloud.plugins.modules import network_segments
+from ansible_collections.openstack.cloud.tests.unit.modules.utils import (
+    AnsibleFailJson,
+    ModuleTestCase,
+    set_module_args,
+)
+
+
+SEGMENTS = [
+    {'id': '1', 'name': 'segment1', 'description': 'first',
+     'network_id': 'net1', 'network_type': 'vlan',
+     'physical_network': 'physnet1', 'segmentation_id': 100},
+    {'id': '2', 'name': 'segment2', 'description': 'second',
+     'network_id': 'net1', 'network_type': 'vlan',
+     'physical_network': 'physnet1', 'segmentation_id': 101},
+    {'id': '3', 'name': 'segment2', 'description': 'second',
+     'network_id': 'net1', 'network_type': 'vlan',
+     'physical_network': 'physnet2', 'segmentation_id': 102},
+]
+
+
+class TestMatchSegment(object):
+
+    def setup_method(self, method):
+        self.index = index_segments(SEGMENTS)
+
+    def test_match_by_name(self):
+        assert match_segment(dict(name='segment1'), self.index) is SEGMENTS[0]
+
+    def test_no_match(self):
+        assert match_segment(dict(name='missing'), self.index) is None
+
+    def test_match_with_filters(self):
+        desired = dict(name='segment2', physical_network='physnet2')
+        assert match_segment(desired, self.index) is SEGMENTS[2]
+
+    def test_filters_exclude_segment(self):
+        desired = dict(name='segment1', network_type='vxlan')
+        assert match_segment(desired, self.index) is None
+
+    def test_unset_filters_are_ignored(self):
+        desired = dict(name='segment1', network_type=None,
+                       physical_network=None)
+        assert match_segment(desired, self.index) is SEGMENTS[0]
+
+    def test_duplicate_segments(self):
+        with pytest.raises(ValueError) as e:
+            match_segment(dict(name='segment2'), self.index)
+
+        assert 'segment2' in str(e.value)
+
+
+class TestReconcileSegment(object):
+
+    def setup_method(self, method):
+        self.conn = mock.MagicMock()
+
+    def test_create(self):
+        desired = dict(name='segment3', description=None, network_id='net1',
+                       network_type='vlan', physical_network='physnet1',
+                       segmentation_id=103)
+
+        changed, segment = reconcile_segment(self.conn, 'present', desired,
+                                             None)
+
+        assert changed
+        assert segment is self.conn.network.create_segment.return_value
+        self.conn.network.create_segment.assert_called_once_with(
+            name='segment3', network_id='net1', network_type='vlan',
+            physical_network='physnet1', segmentation_id=103)
+
+    def test_update_description(self):
+        desired = dict(name='segment1', description='updated')
+
+        changed, segment = reconcile_segment(self.conn, 'present', desired,
+                                             SEGMENTS[0])
+
+        assert changed
+        assert segment is self.conn.network.update_segment.return_value
+        self.conn.network.update_segment.assert_called_once_with(
+            '1', description='updated')
+
+    def test_no_changes(self):
+        desired = dict(name='segment1', description='first',
+                       segmentation_id=999)
+
+        changed, segment = reconcile_segment(self.conn, 'present', desired,
+                                             SEGMENTS[0])
+
+        assert not changed
+        assert segment is SEGMENTS[0]
+        assert not self.conn.network.create_segment.called
+        assert not self.conn.network.update_segment.called
+
+    def test_unset_description_is_not_updated(self):
+        desired = dict(name='segment1', description=None)
+
+        changed, segment = reconcile_segment(self.conn, 'present', desired,
+                                             SEGMENTS[0])
+
+        assert not changed
+        assert not self.conn.network.update_segment.called
+
+    def test_delete(self):
+        changed, segment = reconcile_segment(
+            self.conn, 'absent', dict(name='segment1'), SEGMENTS[0])
+
+        assert changed
+        assert segment is None
+        self.conn.network.delete_segment.assert_called_once_with('1')
+
+    def test_delete_missing(self):
+        changed, segment = reconcile_segment(
+            self.conn, 'absent', dict(name='missing'), None)
+
+        assert not changed
+        assert segment is None
+        assert not self.conn.network.delete_segment.called
+
+
+class FakeSDK(object):
+    class exceptions:
+        class OpenStackCloudException(Exception):
+            pass
+
+
+class TestNetworkSegments(ModuleTestCase):
+
+    def setUp(self):
+        super(TestNetworkSegments, self).setUp()
+        self.conn = mock.MagicMock()
+        self.conn.network.find_network.return_value.id = 'net1'
+        self.conn.network.segments.return_value = []
+        patcher = mock.patch.object(OpenStackModule,
+                                    'openstack_cloud_from_module',
+                                    return_value=(FakeSDK(), self.conn))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_partial_failure_reports_changes(self):
+        def create_segment(name, **kwargs):
+            if name == 'segment2':
+                raise FakeSDK.exceptions.OpenStackCloudException('boom')
+            return dict(SEGMENTS[0], name=name)
+
+        self.conn.network.create_segment.side_effect = create_segment
+        set_module_args(dict(network='net1',
+                             segments=[dict(name='segment1'),
+                                       dict(name='segment2')]))
+
+        with self.assertRaises(AnsibleFailJson) as exc:
+            network_segments.main()
+
+        result = exc.exception.args[0]
+        assert result['changed']
+        assert 'segment2: boom' in result['msg']
+        assert 'segment1' not in result['msg']
+        assert self.conn.network.create_segment.call_count == 2
+
+    def test_programming_errors_propagate(self):
+        self.conn.network.create_segment.side_effect = TypeError('bug')
+        set_module_args(dict(network='net1',
+                             segments=[dict(name='segment1')]))
+
+        with self.assertRaises(TypeError):
+            network_segments.main()